@@ -0,0 +1,112 @@
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from api.constants import RESPONSE_CACHE_TIMEOUT
+
+RESPONSE_CACHE = 'responses'
+GENERATION_KEY = 'response_cache_generation:{}'
+RESPONSE_KEY = 'response_cache:{}:{}:{}'
+METRICS_KEY = 'response_cache_{}:{}'
+
+
+def get_cache():
+    return caches[RESPONSE_CACHE]
+
+
+def get_generation(group):
+    cache = get_cache()
+    key = GENERATION_KEY.format(group)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_generation_time(group):
+    """Время создания поколения группы, в секундах."""
+    return get_generation(group) // 10 ** 9
+
+
+def get_user_groups(user):
+    """Группы, от поколений которых зависят ответы пользователю."""
+    groups = ['recipes']
+    if user.is_authenticated:
+        groups.append(f'user:{user.id}')
+    return groups
+
+
+def invalidate(*groups):
+    """
+    Сбрасывает закэшированные ответы групп после коммита транзакции,
+    старые ключи истекают сами.
+    """
+    keys = [GENERATION_KEY.format(group) for group in groups]
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def count(metric, group):
+    cache = get_cache()
+    key = METRICS_KEY.format(metric, group)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_metrics(groups):
+    """Возвращает число попаданий и промахов по каждой группе."""
+    cache = get_cache()
+    return {
+        group: {
+            metric: cache.get(METRICS_KEY.format(metric, group), 0)
+            for metric in ('hits', 'misses')
+        }
+        for group in groups
+    }
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Кэширует ответы list и retrieve для анонимных пользователей.
+
+    Ключ строится по полному URL запроса и поколению группы
+    response_cache_group, которое сбрасывают сигналы моделей.
+    """
+    response_cache_group = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        group = self.response_cache_group
+        key = RESPONSE_KEY.format(
+            group,
+            get_generation(group),
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        )
+        data = cache.get(key)
+        if data is not None:
+            count('hits', group)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        count('misses', group)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -1,3 +1,25 @@
+FONT_NAME = 'DejaVuSans'
 FONT_SIZE = 15
 POSITION = (100, 750)
+BOTTOM_MARGIN = 50
 RECIPES_LIMIT = 3
+BULK_RECIPES_LIMIT = 100
+IMAGE_FORMAT_PARAM = 'image_format'
+IMAGE_FORMAT_BASE64 = 'base64'
+IMAGE_HASH_LENGTH = 16
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_DECODE_CHUNK = 64 * 1024
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60 * 24
+INGREDIENT_INDEX_TTL = 5 * 60
+PAGINATION_PARAM = 'pagination'
+PAGINATION_CURSOR = 'cursor'
+COUNT_CACHE_TIMEOUT = 30
+COUNT_ESTIMATE_THRESHOLD = 100_000
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+# Поля пользователя, которые отдаются в рецептах как автор.
+AUTHOR_FIELDS = frozenset({
+    'username', 'email', 'first_name', 'last_name',
+    'avatar', 'avatar_width', 'avatar_height', 'avatar_thumbnails',
+})
@@ -1,7 +1,12 @@
-from django.db.models import Case, IntegerField, Q, When
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Value
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 import unidecode
 
+from api.ingredient_index import ingredient_index
+from recipes.constants import SEARCH_CONFIG
 from recipes.models import Recipe, Ingredient
 
 
@@ -32,6 +37,26 @@ class RecipeFilter(filters.FilterSet):
         return queryset.none() if value else queryset
 
 
+class RecipeSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск рецептов по параметру ?search=.
+
+    Ищет по Recipe.search_vector с русской морфологией, результаты
+    сортируются по релевантности.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '').strip()
+        if not search:
+            return queryset
+        query = SearchQuery(
+            search, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', *Recipe._meta.ordering)
+
+
 class UnidecodeCharFilter(filters.CharFilter):
     def filter(self, queryset, value):
         value = unidecode.unidecode(value)
@@ -50,17 +75,23 @@ class IngredientFilter(filters.FilterSet):
 
     def filter_queryset(self, queryset):
         search_term = self.form.cleaned_data.get('name')
+        contains_term = self.form.cleaned_data.get('name_contains')
+        if settings.INGREDIENT_INDEX and (search_term or contains_term):
+            return ingredient_index.search(search_term, contains_term)
         if search_term:
             search_term = search_term.casefold()
-            queryset = queryset.annotate(
-                starts_with=Case(
-                    When(name__istartswith=search_term, then=1),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            ).order_by('-starts_with', 'name')
+            prefix = queryset.filter(
+                name__istartswith=search_term
+            ).annotate(starts_with=Value(1)).order_by()
+            contains = queryset.filter(
+                name__icontains=search_term
+            ).exclude(
+                name__istartswith=search_term
+            ).annotate(starts_with=Value(0)).order_by()
+            return prefix.union(contains, all=True).order_by(
+                '-starts_with', 'name')
+        if contains_term:
             return queryset.filter(
-                Q(name__istartswith=search_term) | Q(
-                    name__icontains=search_term)
-            )
+                name__icontains=contains_term.casefold()
+            ).order_by('name')
         return queryset
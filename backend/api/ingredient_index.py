@@ -0,0 +1,88 @@
+import threading
+import time
+from bisect import bisect_left
+
+import unidecode
+
+from api.constants import INGREDIENT_INDEX_TTL
+from recipes.models import Ingredient
+
+MAX_CHAR = '\U0010ffff'
+
+
+def normalize(value):
+    return unidecode.unidecode(value).casefold()
+
+
+class IngredientIndex:
+    """
+    Отсортированный индекс названий ингредиентов в памяти процесса.
+
+    Ключи приводятся к виду unidecode + casefold, как в IngredientFilter.
+    Индекс строится при первом обращении, сбрасывается сигналами
+    сохранения и удаления ингредиента и перестраивается по истечении TTL,
+    чтобы подхватывать изменения из других процессов.
+    """
+
+    def __init__(self, ttl=INGREDIENT_INDEX_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.built_at = 0
+
+    def invalidate(self):
+        self.snapshot = None
+
+    def build(self):
+        ingredients = sorted(
+            Ingredient.objects.only('id', 'name', 'measurement_unit'),
+            key=lambda ingredient: normalize(ingredient.name)
+        )
+        keys = [normalize(ingredient.name) for ingredient in ingredients]
+        return keys, ingredients
+
+    def get_snapshot(self):
+        snapshot = self.snapshot
+        if (snapshot is not None
+                and time.monotonic() - self.built_at < self.ttl):
+            return snapshot
+        with self.lock:
+            if (self.snapshot is None
+                    or time.monotonic() - self.built_at >= self.ttl):
+                self.snapshot = self.build()
+                self.built_at = time.monotonic()
+            return self.snapshot
+
+    def search(self, name=None, name_contains=None):
+        """
+        Возвращает ингредиенты в порядке IngredientFilter:
+        сначала начинающиеся с name, затем содержащие его, по алфавиту.
+        """
+        keys, ingredients = self.get_snapshot()
+        if name:
+            term = normalize(name)
+            start = bisect_left(keys, term)
+            end = bisect_left(keys, term + MAX_CHAR, start)
+            prefix = ingredients[start:end]
+            contains = [
+                ingredient
+                for key, ingredient in zip(keys, ingredients)
+                if term in key and not key.startswith(term)
+            ]
+            return self.by_name(prefix) + self.by_name(contains)
+        if name_contains:
+            term = normalize(name_contains)
+            return self.by_name(
+                ingredient
+                for key, ingredient in zip(keys, ingredients)
+                if term in key
+            )
+        return self.by_name(ingredients)
+
+    @staticmethod
+    def by_name(ingredients):
+        return sorted(
+            ingredients, key=lambda ingredient: ingredient.name.casefold())
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_metrics
+
+GROUPS = ('recipes', 'tags', 'ingredients')
+
+
+class Command(BaseCommand):
+    """
+    Выводит число попаданий и промахов кэша ответов API.
+    """
+
+    def handle(self, *args, **options):
+        for group, metrics in get_metrics(GROUPS).items():
+            total = metrics['hits'] + metrics['misses']
+            ratio = metrics['hits'] / total if total else 0
+            self.stdout.write(
+                f'{group}: {metrics["hits"]} hits, '
+                f'{metrics["misses"]} misses ({ratio:.0%})'
+            )
@@ -1,7 +1,124 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from api.cache import get_generation, get_user_groups
+from api.constants import (
+    COUNT_CACHE_TIMEOUT, COUNT_ESTIMATE_THRESHOLD,
+    PAGINATION_CURSOR, PAGINATION_PARAM
+)
+
+
+def estimate_count(model, using):
+    """Оценка числа строк таблицы по статистике PostgreSQL."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, который не считает COUNT(*) на каждый запрос.
+
+    Для списков без фильтров берется оценка из pg_class.reltuples,
+    если таблица достаточно большая, остальные счетчики кэшируются
+    на короткое время по тексту SQL-запроса и поколениям кэша ответов,
+    чтобы изменения пользователя сразу сбрасывали его счетчики.
+    """
+    count_is_approximate = False
+
+    def __init__(self, *args, generations=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.generations = generations
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.is_empty():
+            return super().count
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+                self.count_is_approximate = True
+                return estimate
+        key = 'pagination_count:' + hashlib.md5('{}:{}'.format(
+            list(self.generations), queryset.query
+        ).encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
     max_page_size = 100
+
+    def django_paginator_class(self, object_list, per_page):
+        # DRF создает пагинатор этим вызовом уже после записи self.request.
+        return CachedCountPaginator(object_list, per_page, generations=[
+            get_generation(group)
+            for group in get_user_groups(self.request.user)
+        ])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_approximate': (
+                self.page.paginator.count_is_approximate),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = CustomPageNumberPagination.page_size
+    page_size_query_param = CustomPageNumberPagination.page_size_query_param
+    max_page_size = CustomPageNumberPagination.max_page_size
+    ordering = ('-pub_date', 'id')
+
+
+class FeedCursorPagination(RecipeCursorPagination):
+    ordering = ('-feed_pub_date',)
+
+
+class RecipePagination(CustomPageNumberPagination):
+    """
+    Постраничная пагинация ленты рецептов.
+
+    По параметру ?pagination=cursor (и в ссылках с ?cursor=) переключается
+    на курсорную пагинацию без COUNT(*) и OFFSET.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(PAGINATION_PARAM) == PAGINATION_CURSOR
+                or RecipeCursorPagination.cursor_query_param
+                in request.query_params):
+            self.cursor_paginator = RecipeCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
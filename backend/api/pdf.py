@@ -0,0 +1,51 @@
+import os
+from io import BytesIO
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from api.constants import BOTTOM_MARGIN, FONT_NAME, FONT_SIZE, POSITION
+from api.shopping_cart import format_line
+
+FONT_PATH = os.path.join(
+    os.path.dirname(__file__), '../ttf/DejaVuSans.ttf')
+
+
+def register_fonts():
+    """
+    Регистрирует шрифт в reportlab один раз на процесс.
+
+    Разобранный TTF и кэш его подмножеств живут в реестре pdfmetrics
+    и переиспользуются всеми документами.
+    """
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def render_shopping_cart(ingredients):
+    """
+    Рисует список покупок в PDF и возвращает буфер с документом.
+
+    Строки переносятся на новую страницу, когда доходят до нижнего поля,
+    поэтому ingredients можно передавать итератором.
+    """
+    register_fonts()
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer)
+    left, top = POSITION
+    p.setFont(FONT_NAME, FONT_SIZE)
+    p.drawString(left, top, 'Список покупок:')
+    top -= FONT_SIZE
+
+    for ingredient in ingredients:
+        if top < BOTTOM_MARGIN:
+            p.showPage()
+            p.setFont(FONT_NAME, FONT_SIZE)
+            top = POSITION[1]
+        p.drawString(left, top, format_line(ingredient))
+        top -= FONT_SIZE
+    p.showPage()
+    p.save()
+    buffer.seek(0)
+    return buffer
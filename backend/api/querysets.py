@@ -0,0 +1,39 @@
+from django.db.models import Exists, OuterRef, Prefetch
+
+from recipes.models import (
+    Favorite, Recipe, RecipeIngredient, ShoppingCart, Subscribe, Tag
+)
+
+
+def recipe_read_queryset(user):
+    """
+    Рецепты со всеми связями, которые читает RecipeSerializer.
+
+    Ингредиенты рецепта подгружаются вместе с ингредиентом,
+    флаги пользователя вычисляются подзапросами Exists().
+    """
+    queryset = Recipe.objects.defer('search_vector').select_related(
+        'author'
+    ).prefetch_related(
+        Prefetch(
+            'recipe_ingredients',
+            queryset=RecipeIngredient.objects.select_related(
+                'ingredient'
+            ).only(
+                'id', 'recipe_id', 'amount',
+                'ingredient__id', 'ingredient__name',
+                'ingredient__measurement_unit',
+            )
+        ),
+        Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'slug')),
+    )
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(
+        is_favorited=Exists(Favorite.objects.filter(
+            user=user, recipe=OuterRef('pk'))),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('pk'))),
+        author_is_subscribed=Exists(Subscribe.objects.filter(
+            user=user, subscribe=OuterRef('author'))),
+    )
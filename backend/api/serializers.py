@@ -1,11 +1,24 @@
 import base64
+import hashlib
+import tempfile
 
 from django.contrib.auth import authenticate, get_user_model
-from django.core.files.base import ContentFile
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from djoser.serializers import UserSerializer
+from PIL import Image
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from api.constants import (
+    BULK_RECIPES_LIMIT, IMAGE_DECODE_CHUNK, IMAGE_FORMAT_BASE64,
+    IMAGE_FORMAT_PARAM, IMAGE_FORMATS, IMAGE_HASH_LENGTH, IMAGE_MAX_PIXELS,
+    IMAGE_MAX_SIZE
+)
+
+from recipes.inserts import create_if_absent
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -20,24 +33,113 @@ User = get_user_model()
 
 
 class Imagebase64Field(serializers.Field):
+    """
+    Принимает изображение в base64 или файлом multipart,
+    отдает ссылку на файл в MEDIA_ROOT.
+
+    Base64 декодируется частями во временный файл, изображение
+    проверяется Pillow на формат, размер файла и число пикселей.
+    Старым клиентам изображение в base64 отдается
+    по параметру запроса ?image_format=base64.
+    """
+
     def to_internal_value(self, data):
-        if not data.startswith('data:image/'):
+        if isinstance(data, UploadedFile):
+            if data.size > IMAGE_MAX_SIZE:
+                raise serializers.ValidationError('Image is too large.')
+            digest = hashlib.sha256()
+            for chunk in data.chunks():
+                digest.update(chunk)
+            return self.verify(data, digest)
+        if not isinstance(data, str) or not data.startswith('data:image/'):
             raise serializers.ValidationError(
                 'Invalid image format.'
             )
-        imgstr = data.split(';base64,')[-1]
-        ext = data.split(';base64,')[0].split('/')[-1]
+        start = data.find(';base64,')
+        if start < 0:
+            raise serializers.ValidationError(
+                'Invalid image format.'
+            )
+        file = File(tempfile.TemporaryFile(), name='upload')
         try:
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        except Exception:
+            digest = self.decode_base64(
+                data, start + len(';base64,'), file)
+            return self.verify(file, digest)
+        except serializers.ValidationError:
+            file.close()
+            raise
+
+    def decode_base64(self, data, start, file):
+        """
+        Декодирует base64 из data начиная с start частями в file
+        без копий всей строки.
+
+        Пробельные символы (переносы строк MIME у старых клиентов)
+        убираются в каждой части, неполная четверка символов
+        переносится в следующую часть.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        remainder = ''
+        for offset in range(start, len(data), IMAGE_DECODE_CHUNK):
+            chunk = remainder + ''.join(
+                data[offset:offset + IMAGE_DECODE_CHUNK].split())
+            end = len(chunk) - len(chunk) % 4
+            remainder = chunk[end:]
+            try:
+                decoded = base64.b64decode(chunk[:end], validate=True)
+            except ValueError:
+                raise serializers.ValidationError(
+                    'Invalid image format.'
+                )
+            size += len(decoded)
+            if size > IMAGE_MAX_SIZE:
+                raise serializers.ValidationError('Image is too large.')
+            digest.update(decoded)
+            file.write(decoded)
+        if remainder or not size:
             raise serializers.ValidationError(
                 'Invalid image format.'
             )
-        return data
+        return digest
+
+    def verify(self, file, digest):
+        """Проверяет изображение Pillow и называет файл по хешу."""
+        try:
+            file.seek(0)
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+                image.verify()
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            raise serializers.ValidationError(
+                'Invalid image format.'
+            )
+        if image_format not in IMAGE_FORMATS:
+            raise serializers.ValidationError(
+                'Unsupported image format.'
+            )
+        if width * height > IMAGE_MAX_PIXELS:
+            raise serializers.ValidationError('Image is too large.')
+        file.seek(0)
+        file.name = '{}.{}'.format(
+            digest.hexdigest()[:IMAGE_HASH_LENGTH],
+            IMAGE_FORMATS[image_format]
+        )
+        return file
 
     def to_representation(self, value):
         if not value:
             return None
+        request = self.context.get('request')
+        if request is not None and request.query_params.get(
+                IMAGE_FORMAT_PARAM) == IMAGE_FORMAT_BASE64:
+            return self.to_base64(value)
+        if request is not None:
+            return request.build_absolute_uri(value.url)
+        return value.url
+
+    def to_base64(self, value):
         try:
             with open(value.path, 'rb') as image_file:
                 data = image_file.read()
@@ -48,9 +150,26 @@ class Imagebase64Field(serializers.Field):
             return None
 
 
+class ThumbnailsField(serializers.ReadOnlyField):
+    """Ссылки на уменьшенные копии изображения: {размер: {формат: url}}."""
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for size, names in value.items():
+            urls[size] = {}
+            for ext, name in names.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[size][ext] = url
+        return urls
+
+
 class UserCustomSerializer(UserSerializer):
     """Сериализатор пользователей."""
     avatar = Imagebase64Field()
+    avatar_thumbnails = ThumbnailsField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -63,21 +182,59 @@ class UserCustomSerializer(UserSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_width',
+            'avatar_height',
+            'avatar_thumbnails',
         )
+        read_only_fields = ('avatar_width', 'avatar_height')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
         return user.subscribed.filter(subscribe=obj).exists()
 
 
+def resolve_ids(queryset, ids):
+    """
+    Возвращает объекты по списку id одним запросом IN
+    в порядке списка.
+    """
+    objects = queryset.in_bulk(ids)
+    missing = [pk for pk in ids if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            f'Objects with ID {missing} do not exist.')
+    return [objects[pk] for pk in ids]
+
+
+class ManyIdsField(serializers.ListField):
+    """
+    Список id связанных объектов.
+
+    В отличие от PrimaryKeyRelatedField(many=True) проверяет
+    все id одним запросом.
+    """
+
+    child = serializers.IntegerField()
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return resolve_ids(self.queryset, super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return [item.pk for item in value.all()]
+
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор ингредиентов рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(
-        source='ingredient.id', queryset=Ingredient.objects.all()
-    )
+    id = serializers.IntegerField(source='ingredient_id')
     name = serializers.CharField(source='ingredient.name', read_only=True)
     measurement_unit = serializers.CharField(
         source='ingredient.measurement_unit', read_only=True)
@@ -109,6 +266,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True, read_only=True, source='recipe_ingredients')
     author = UserCustomSerializer(read_only=True)
     image = Imagebase64Field()
+    image_thumbnails = ThumbnailsField()
 
     class Meta:
         model = Recipe
@@ -116,6 +274,9 @@ class RecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_width',
+            'image_height',
+            'image_thumbnails',
             'text',
             'ingredients',
             'author',
@@ -125,13 +286,22 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context['request'].user
         if user.is_authenticated:
             return user.favorites.filter(recipe=obj).exists()
         return False
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         if user.is_authenticated:
             return user.shopping_cart.filter(recipe=obj).exists()
@@ -141,8 +311,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 class RecipeCreateUpdateSerializer(RecipeSerializer):
     """Сериализатор создания и обновления рецептов."""
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True)
+    tags = ManyIdsField(queryset=Tag.objects.all())
     ingredients = RecipeIngredientSerializer(
         many=True, source='recipe_ingredients')
 
@@ -152,6 +321,9 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
             'id',
             'name',
             'image',
+            'image_width',
+            'image_height',
+            'image_thumbnails',
             'text',
             'ingredients',
             'author',
@@ -167,12 +339,18 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
             raise serializers.ValidationError({
                 'ingredients': 'Ingredients are required.'
             })
-        ingredient_ids = [ingredient['ingredient']['id'].id
+        ingredient_ids = [ingredient['ingredient_id']
                           for ingredient in data['recipe_ingredients']]
         if len(ingredient_ids) != len(set(ingredient_ids)):
             raise serializers.ValidationError({
                 'ingredients': 'Duplicate ingredients are not allowed.'
             })
+        try:
+            resolve_ids(Ingredient.objects.only('id'), ingredient_ids)
+        except serializers.ValidationError as error:
+            raise serializers.ValidationError({
+                'ingredients': error.detail
+            })
 
         if not data.get('tags'):
             raise serializers.ValidationError({
@@ -194,68 +372,90 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
         return representation
 
     def create_tags(self, tags, recipe):
-        try:
-            recipe.tags.add(*tags)
-        except Tag.DoesNotExist:
-            raise serializers.ValidationError(
-                'Tag does not exist.')
+        recipe.tags.add(*tags)
 
     def create_ingredients(self, ingredients, recipe):
-        current_ingredients = recipe.recipe_ingredients.all()
-        ingredients_to_create = []
-        for ingredient in ingredients:
-            try:
-                existing_ingredient = current_ingredients.get(
-                    ingredient_id=ingredient['ingredient']['id'].id)
-                existing_ingredient.amount = ingredient['amount']
-                ingredients_to_create.append(existing_ingredient)
-            except RecipeIngredient.DoesNotExist:
-                ingredients_to_create.append(RecipeIngredient(
-                    recipe=recipe,
-                    ingredient_id=ingredient['ingredient']['id'].id,
-                    amount=ingredient['amount']
-                ))
-            except Ingredient.DoesNotExist:
-                raise serializers.ValidationError(
-                    f'Ingredient with ID {ingredient["id"]} does not exist.')
-        current_ingredients.delete()
-        RecipeIngredient.objects.bulk_create(ingredients_to_create)
-
+        """
+        Сохраняет ингредиенты рецепта по разнице с текущими строками.
+
+        Текущие строки читаются одним запросом, изменения применяются
+        через bulk_create, bulk_update и один DELETE ... IN
+        в транзакции create или update.
+        Сигналы по строкам не отправляются: кэши и версию корзины
+        обновляет последующее сохранение рецепта или корзины.
+        """
+        amounts = {
+            ingredient['ingredient_id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        to_update = []
+        to_delete = []
+        current_ingredients = RecipeIngredient.objects.filter(
+            recipe=recipe).only('id', 'ingredient_id', 'amount')
+        for current in current_ingredients:
+            amount = amounts.pop(current.ingredient_id, None)
+            if amount is None:
+                to_delete.append(current.pk)
+            elif amount != current.amount:
+                current.amount = amount
+                to_update.append(current)
+        to_create = [
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount)
+            for ingredient_id, amount in amounts.items()
+        ]
+        if to_delete:
+            RecipeIngredient.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ['amount'])
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('recipe_ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
+        self.create_tags(tags, recipe)
+        self.create_ingredients(ingredients, recipe)
         Favorite.objects.create(
             user=self.context['request'].user, recipe=recipe)
         ShoppingCart.objects.create(
             user=self.context['request'].user, recipe=recipe
         )
-        try:
-            self.create_tags(tags, recipe)
-            self.create_ingredients(ingredients, recipe)
-        except serializers.ValidationError as error:
-            recipe.delete()
-            raise error
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('recipe_ingredients')
-        recipe = super().update(instance, validated_data)
-        recipe.tags.clear()
-        self.create_tags(tags, recipe)
-        self.create_ingredients(ingredients, recipe)
-        return instance
+        instance.tags.set(tags)
+        self.create_ingredients(ingredients, instance)
+        return super().update(instance, validated_data)
 
 
 class RecipeGetSerializer(serializers.ModelSerializer):
     """Сериализатор списка покупок."""
+    image_thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnails', 'cooking_time')
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления и удаления."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
 class UserRegisterSerializer(serializers.ModelSerializer):
     """Сериализатор регистрации."""
 
@@ -274,10 +474,14 @@ class UserRegisterSerializer(serializers.ModelSerializer):
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор аватара."""
     avatar = Imagebase64Field()
+    avatar_thumbnails = ThumbnailsField()
 
     class Meta:
         model = User
-        fields = ('avatar',)
+        fields = (
+            'avatar', 'avatar_width', 'avatar_height', 'avatar_thumbnails'
+        )
+        read_only_fields = ('avatar_width', 'avatar_height')
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -292,20 +496,23 @@ class SubscribeCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscribe
         fields = ('user', 'subscribe')
+        # Повторную подписку отсекает ON CONFLICT в create().
+        validators = []
 
     def validate(self, data):
         if data['subscribe'] == data['user']:
             raise serializers.ValidationError(
                 {'subscribe': 'You cannot subscribe to yourself'}
             )
-        if data['user'].subscribed.filter(
-            subscribe=data['subscribe']
+        return data
 
-        ).exists():
+    def create(self, validated_data):
+        subscription = create_if_absent(Subscribe, **validated_data)
+        if subscription is None:
             raise serializers.ValidationError(
-                {'subscribe': 'You are already subscribed to this author'}
+                {'subscribe': ['You are already subscribed to this author']}
             )
-        return data
+        return subscription
 
 
 class SubscribeSerializer(UserCustomSerializer):
@@ -335,6 +542,9 @@ class SubscribeSerializer(UserCustomSerializer):
         return True
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'limited_recipes'):
+            return RecipeGetSerializer(
+                obj.limited_recipes, many=True, context=self.context).data
         recipes_limit = self.context.get('recipes_limit')
         try:
             recipes_limit = int(recipes_limit)
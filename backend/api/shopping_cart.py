@@ -0,0 +1,94 @@
+import csv
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from api.constants import SHOPPING_CART_CACHE_TIMEOUT
+
+CART_VERSION_KEY = 'shopping_cart_version:{}'
+CART_FILE_KEY = 'shopping_cart_file:{}:{}'
+
+
+def get_cart_version(user_id):
+    """Возвращает текущую версию списка покупок пользователя."""
+    key = CART_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cart_version(user_ids):
+    """
+    Сбрасывает версии списков покупок, старые файлы больше не отдаются.
+
+    Сброс выполняется после коммита транзакции: иначе параллельная
+    выгрузка успеет сохранить старые данные под новой версией.
+    """
+    keys = [CART_VERSION_KEY.format(user_id) for user_id in set(user_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_cart_etag(user_id, version, file_format):
+    return f'"{user_id}-{version}-{file_format}"'
+
+
+def get_cached_file(user_id, version):
+    return cache.get(CART_FILE_KEY.format(user_id, version))
+
+
+def set_cached_file(user_id, version, content):
+    cache.set(
+        CART_FILE_KEY.format(user_id, version),
+        content,
+        SHOPPING_CART_CACHE_TIMEOUT
+    )
+
+
+def format_line(ingredient):
+    return (f'{ingredient["name"]} ({ingredient["unit"]}) '
+            f'— {ingredient["amount"]}')
+
+
+def write_txt(ingredients):
+    yield 'Список покупок:\n'
+    for ingredient in ingredients:
+        yield format_line(ingredient) + '\n'
+
+
+class Echo:
+    """Буфер для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def write_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['name'], ingredient['unit'], ingredient['amount']))
+
+
+def write_json(ingredients):
+    yield '['
+    separator = ''
+    for ingredient in ingredients:
+        yield separator + json.dumps({
+            'name': ingredient['name'],
+            'measurement_unit': ingredient['unit'],
+            'amount': ingredient['amount'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+WRITERS = {
+    'txt': write_txt,
+    'csv': write_csv,
+    'json': write_json,
+}
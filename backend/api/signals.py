@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.cache import invalidate
+from api.constants import AUTHOR_FIELDS
+from api.ingredient_index import ingredient_index
+from api.shopping_cart import bump_cart_version
+from recipes.models import (
+    Favorite, Ingredient, Recipe, ShoppingCart, Subscribe, Tag
+)
+from recipes.signals import user_recipes_changed
+
+User = get_user_model()
+
+
+def cart_users(**filters):
+    return ShoppingCart.objects.filter(**filters).values_list(
+        'user_id', flat=True)
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    bump_cart_version([instance.user_id])
+
+
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def shopping_cart_bulk_changed(sender, user_id, **kwargs):
+    bump_cart_version([user_id])
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.pk).update(
+        search_vector=Recipe.get_search_vector())
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_cart_version(cart_users(recipe=instance))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    # Строки рецептов удаляются каскадом без сигналов уровня рецепта,
+    # корзины находим до удаления.
+    bump_cart_version(cart_users(
+        recipe__recipe_ingredients__ingredient=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_cart_version(cart_users(
+            recipe__recipe_ingredients__ingredient=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_index_changed(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(post_delete, sender=User)
+def recipes_response_changed(sender, **kwargs):
+    invalidate('recipes')
+
+
+def author_changed(instance, created, update_fields):
+    """
+    Изменились ли данные автора, которые есть в ответах рецептов.
+
+    Регистрация, смена пароля и last_login рецепты не затрагивают.
+    """
+    if created:
+        return False
+    if (update_fields is not None
+            and AUTHOR_FIELDS.isdisjoint(update_fields)):
+        return False
+    return instance.recipes.exists()
+
+
+@receiver(post_save, sender=User)
+def author_response_changed(sender, instance, created, update_fields,
+                            **kwargs):
+    if author_changed(instance, created, update_fields):
+        invalidate('recipes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tags_response_changed(sender, **kwargs):
+    invalidate('tags', 'recipes')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredients_response_changed(sender, **kwargs):
+    invalidate('ingredients', 'recipes')
+
+
+def touch_recipes(**filters):
+    Recipe.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_touched(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        touch_recipes(pk__in=pk_set or ())
+    else:
+        touch_recipes(pk=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def author_touched(sender, instance, created, update_fields, **kwargs):
+    if author_changed(instance, created, update_fields):
+        touch_recipes(author=instance)
+
+
+@receiver(post_save, sender=Tag)
+def tag_touched(sender, instance, created, **kwargs):
+    if not created:
+        touch_recipes(tags=instance)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_touched(sender, instance, created, **kwargs):
+    if not created:
+        touch_recipes(ingredients=instance)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleted_touched(sender, instance, **kwargs):
+    touch_recipes(ingredients=instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def user_flags_changed(sender, instance, **kwargs):
+    invalidate(f'user:{instance.user_id}')
+
+
+@receiver(user_recipes_changed)
+def user_flags_bulk_changed(sender, user_id, **kwargs):
+    invalidate(f'user:{user_id}')
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Subscribe,
+    Tag
+)
+
+User = get_user_model()
+
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNoAA'
+    'AAggCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password',
+        first_name=username,
+        last_name=username,
+    )
+
+
+def create_recipe(author, ingredients, tags, name='Рецепт'):
+    """Создает рецепт через ORM, без загрузки изображения."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text='Описание',
+        cooking_time=10,
+        image='recipes/images/test.png',
+    )
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=index)
+        for index, ingredient in enumerate(ingredients, start=1)
+    )
+    return recipe
+
+
+class APITestCase(TestCase):
+    """
+    Общие данные: два пользователя, теги, ингредиенты и рецепты
+    второго пользователя в избранном, корзине и подписках первого.
+    """
+    recipes_count = 25
+    ingredients_per_recipe = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('user')
+        cls.author = create_user('author')
+        cls.tags = [
+            Tag.objects.create(name='Завтрак', slug='breakfast'),
+            Tag.objects.create(name='Обед', slug='lunch'),
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г')
+            for index in range(50)
+        ]
+        cls.recipes = [
+            create_recipe(
+                cls.author,
+                cls.ingredients[index:index + cls.ingredients_per_recipe],
+                cls.tags,
+                name=f'Рецепт {index}',
+            )
+            for index in range(cls.recipes_count)
+        ]
+        Subscribe.objects.create(user=cls.user, subscribe=cls.author)
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        for alias in ('default', 'responses'):
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
@@ -0,0 +1,97 @@
+import threading
+from unittest import skipUnless
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.tests.base import create_recipe, create_user
+from recipes.models import (
+    Favorite, Ingredient, ShoppingCart, Subscribe, Tag
+)
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'SQLite does not wait for row locks and fails with "table is locked"'
+)
+class ConcurrentAddTest(TransactionTestCase):
+    """
+    Одновременные повторные добавления: одна запись создается,
+    остальные запросы получают 400 вместо IntegrityError.
+    """
+    threads_count = 8
+
+    def setUp(self):
+        for alias in ('default', 'responses'):
+            caches[alias].clear()
+        self.user = create_user('user')
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        ingredient = Ingredient.objects.create(
+            name='Ингредиент', measurement_unit='г')
+        self.author = create_user('author')
+        self.recipe = create_recipe(self.author, [ingredient], [tag])
+
+    def request_concurrently(self, method, url, data=None):
+        barrier = threading.Barrier(self.threads_count)
+        responses = []
+
+        def send():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                responses.append(
+                    getattr(client, method)(url, data, format='json'))
+            finally:
+                # У каждого потока свое соединение с базой.
+                connection.close()
+
+        threads = [
+            threading.Thread(target=send)
+            for _ in range(self.threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def assert_added_once(self, url, queryset):
+        responses = self.request_concurrently('post', url)
+        self.assertEqual(
+            sorted(response.status_code for response in responses),
+            [201] + [400] * (self.threads_count - 1)
+        )
+        self.assertEqual(queryset.count(), 1)
+
+    def test_shopping_cart(self):
+        self.assert_added_once(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/',
+            ShoppingCart.objects.filter(user=self.user, recipe=self.recipe)
+        )
+
+    def test_favorite(self):
+        self.assert_added_once(
+            f'/api/recipes/{self.recipe.id}/favorite/',
+            Favorite.objects.filter(user=self.user, recipe=self.recipe)
+        )
+
+    def test_subscribe(self):
+        self.assert_added_once(
+            f'/api/users/{self.author.id}/subscribe/',
+            Subscribe.objects.filter(user=self.user, subscribe=self.author)
+        )
+
+    def test_bulk_delete_favorites(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        responses = self.request_concurrently(
+            'delete', '/api/recipes/favorite/bulk/',
+            {'recipes': [self.recipe.id]}
+        )
+        statuses = sorted(
+            response.data['recipes'][0]['status'] for response in responses)
+        self.assertEqual(statuses, [204] + [400] * (self.threads_count - 1))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
@@ -0,0 +1,29 @@
+from unittest import mock
+
+from api.tests.base import APITestCase, create_recipe, create_user
+from recipes.feed import build_feed
+from recipes.models import FeedItem, Subscribe
+
+
+class BuildFeedTest(APITestCase):
+    """Пересборка лент не зависит от числа подписок по запросам."""
+
+    @mock.patch('recipes.feed.FEED_BATCH_SIZE', 10)
+    def test_build_feed(self):
+        for index in range(5):
+            reader = create_user(f'reader{index}')
+            Subscribe.objects.create(user=reader, subscribe=self.author)
+        other = create_user('other')
+        create_recipe(other, self.ingredients[:1], self.tags)
+        Subscribe.objects.create(user=self.user, subscribe=other)
+        expected = set(FeedItem.objects.values_list('user_id', 'recipe_id'))
+        FeedItem.objects.all().delete()
+        # 6 подписчиков автора по 25 рецептов и 1 рецепт другого автора:
+        # 151 запись, выборка и 16 вставок по 10.
+        with self.assertNumQueries(17):
+            build_feed()
+        self.assertEqual(
+            set(FeedItem.objects.values_list('user_id', 'recipe_id')),
+            expected
+        )
+        self.assertEqual(len(expected), 151)
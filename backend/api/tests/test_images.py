@@ -0,0 +1,35 @@
+from unittest import mock
+
+from rest_framework import serializers
+from rest_framework.test import APISimpleTestCase
+
+from api.serializers import Imagebase64Field
+from api.tests.base import PNG
+
+
+@mock.patch('api.serializers.IMAGE_DECODE_CHUNK', 5)
+class Base64ImageTest(APISimpleTestCase):
+    """Base64 декодируется частями, не кратными четырем символам."""
+
+    def decode(self, data):
+        file = Imagebase64Field().to_internal_value(data)
+        self.addCleanup(file.close)
+        return file
+
+    def test_wrapped_lines(self):
+        header, encoded = PNG.split(',')
+        wrapped = '\r\n'.join(
+            encoded[start:start + 7] for start in range(0, len(encoded), 7))
+        self.assertEqual(
+            self.decode(f'{header},{wrapped}').read(),
+            self.decode(PNG).read()
+        )
+
+    def test_incomplete_quartet(self):
+        with self.assertRaises(serializers.ValidationError):
+            self.decode(PNG[:-1])
+
+    def test_too_large(self):
+        with mock.patch('api.serializers.IMAGE_MAX_SIZE', 10):
+            with self.assertRaises(serializers.ValidationError):
+                self.decode(PNG)
@@ -0,0 +1,29 @@
+from api.tests.base import APITestCase
+
+
+class CachedCountTest(APITestCase):
+    """Кэшированный COUNT(*) сбрасывается действиями пользователя."""
+
+    def get_count(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def test_favorite_resets_count(self):
+        url = '/api/recipes/'
+        params = {'is_favorited': 1}
+        count = self.get_count(url, params)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/recipes/{self.recipes[1].id}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_count(url, params), count + 1)
+
+    def test_unsubscribe_resets_count(self):
+        url = '/api/users/subscriptions/'
+        self.assertEqual(self.get_count(url), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_count(url), 0)
@@ -0,0 +1,153 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from api.tests.base import PNG, APITestCase, create_recipe, create_user
+from recipes.models import Recipe, Subscribe
+
+
+class ListQueriesTest(APITestCase):
+    """Число запросов списков не зависит от размера страницы."""
+
+    def assert_constant_queries(self, url, num, params=None):
+        for limit in (1, 20):
+            # Иначе COUNT(*) второго запроса берется из кэша.
+            cache.clear()
+            with self.subTest(limit=limit), self.assertNumQueries(num):
+                response = self.client.get(
+                    url, {**(params or {}), 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+        return response
+
+    def test_recipe_list(self):
+        # Слаги тегов для фильтра, оценка числа строк, COUNT(*),
+        # рецепты с автором и флагами, ингредиенты, теги.
+        self.assert_constant_queries('/api/recipes/', 6)
+
+    def test_user_list(self):
+        # Обычным пользователям djoser показывает только их самих.
+        self.user.is_staff = True
+        self.user.save()
+        for index in range(20):
+            create_user(f'reader{index}')
+        # Оценка числа строк, COUNT(*), пользователи с флагом подписки.
+        self.assert_constant_queries('/api/users/', 3)
+
+    def test_subscriptions(self):
+        for index in range(20):
+            author = create_user(f'author{index}')
+            for _ in range(3):
+                create_recipe(author, self.ingredients[:1], self.tags)
+            Subscribe.objects.create(user=self.user, subscribe=author)
+        # COUNT(*), авторы с числом рецептов, рецепты всех авторов.
+        response = self.assert_constant_queries(
+            '/api/users/subscriptions/', 3, {'recipes_limit': 2})
+        for author in response.data['results']:
+            self.assertEqual(len(author['recipes']), 2)
+
+
+class RecipePayloadMixin:
+    """Тело запроса создания и обновления рецепта."""
+
+    def get_payload(self, ingredients):
+        return {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': PNG,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in ingredients
+            ],
+        }
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RecipeQueriesTest(RecipePayloadMixin, APITestCase):
+    """Число запросов чтения и ответов на запись рецепта."""
+
+    def test_retrieve(self):
+        # updated_at для Last-Modified, слаги тегов для фильтра,
+        # рецепт с автором и флагами, ингредиенты, теги.
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.data['ingredients']), self.ingredients_per_recipe)
+
+    def test_create(self):
+        # Проверка тегов и ингредиентов, транзакция с рецептом, тегами,
+        # ингредиентами, избранным и корзиной вместе с сигналами
+        # (уменьшенные копии, счетчики, лента, поисковый вектор),
+        # повторное чтение рецепта тремя запросами.
+        for count in (1, 20):
+            with self.subTest(ingredients=count), self.assertNumQueries(20):
+                response = self.client.post(
+                    '/api/recipes/',
+                    self.get_payload(self.ingredients[:count]),
+                    format='json'
+                )
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['ingredients']), count)
+
+    def test_update(self):
+        # Рецепт, проверка тегов и ингредиентов, транзакция: теги,
+        # текущие ингредиенты, один DELETE и один INSERT, сохранение
+        # рецепта с сигналами, повторное чтение рецепта.
+        for count in (1, 20):
+            recipe = create_recipe(
+                self.user, self.ingredients[:5], self.tags)
+            with self.subTest(ingredients=count), self.assertNumQueries(19):
+                response = self.client.patch(
+                    f'/api/recipes/{recipe.id}/',
+                    self.get_payload(self.ingredients[10:10 + count]),
+                    format='json'
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['ingredients']), count)
+
+
+class RecipeValidationQueriesTest(RecipePayloadMixin, APITestCase):
+    """Проверка id тегов и ингредиентов одним запросом IN на каждый."""
+
+    unknown_id = 10 ** 6
+
+    def assert_rejected(self, method, url, field, num):
+        for count in (1, 20):
+            payload = self.get_payload(self.ingredients[:count])
+            if field == 'ingredients':
+                payload['ingredients'].append(
+                    {'id': self.unknown_id, 'amount': 10})
+            else:
+                payload['tags'].append(self.unknown_id)
+            with self.subTest(ingredients=count), self.assertNumQueries(num):
+                response = getattr(self.client, method)(
+                    url, payload, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.data)
+
+    def test_create_unknown_ingredient(self):
+        # Теги, ингредиенты; рецепт не создается.
+        self.assert_rejected('post', '/api/recipes/', 'ingredients', 2)
+        self.assertFalse(
+            Recipe.objects.filter(name='Новый рецепт').exists())
+
+    def test_create_unknown_tag(self):
+        # Только теги: при ошибке поля validate() не вызывается.
+        self.assert_rejected('post', '/api/recipes/', 'tags', 1)
+
+    def test_update_unknown_ingredient(self):
+        recipe = create_recipe(self.user, self.ingredients[:5], self.tags)
+        # Слаги тегов для фильтра, рецепт с ингредиентами и тегами,
+        # теги, ингредиенты.
+        self.assert_rejected(
+            'patch', f'/api/recipes/{recipe.id}/', 'ingredients', 6)
+        self.assertEqual(recipe.recipe_ingredients.count(), 5)
+
+    def test_update_unknown_tag(self):
+        recipe = create_recipe(self.user, self.ingredients[:5], self.tags)
+        # Слаги тегов для фильтра, рецепт с ингредиентами и тегами, теги.
+        self.assert_rejected('patch', f'/api/recipes/{recipe.id}/', 'tags', 5)
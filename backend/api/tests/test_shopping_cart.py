@@ -0,0 +1,128 @@
+import json
+import re
+from collections import Counter
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import RequestFactory
+from reportlab.pdfgen.canvas import Canvas
+
+from api.tests.base import APITestCase, create_recipe, create_user
+from api.views import DownloadShoppingCart
+from recipes.models import Ingredient, Recipe, RecipeIngredient, ShoppingCart
+
+
+class ShoppingCartTotalsTest(APITestCase):
+    """
+    Суммы списка покупок по id ингредиента совпадают
+    с группировкой по названию и единице измерения, а запрос
+    читает строки рецептов по покрывающему индексу.
+    """
+    cart_size = 500
+    # Рецепты вне корзины, чтобы корзина была малой долей таблицы.
+    other_recipes_count = 4500
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.buyer = create_user('buyer')
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.author,
+                name=f'Рецепт для корзины {index}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/images/test.png',
+            )
+            for index in range(cls.cart_size + cls.other_recipes_count)
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=cls.ingredients[(index * 7 + offset) % 50],
+                amount=index % 13 + offset + 1,
+            )
+            for index, recipe in enumerate(recipes)
+            for offset in range(cls.ingredients_per_recipe)
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=cls.buyer, recipe=recipe)
+            for recipe in recipes[:cls.cart_size]
+        )
+
+    def get_expected_totals(self):
+        totals = Counter()
+        rows = RecipeIngredient.objects.filter(
+            recipe__shopping_cart__user=self.buyer
+        ).select_related('ingredient')
+        for row in rows:
+            ingredient = row.ingredient
+            totals[ingredient.name, ingredient.measurement_unit] += row.amount
+        return totals
+
+    def test_totals(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        ingredients = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            {
+                (ingredient['name'], ingredient['measurement_unit']):
+                    ingredient['amount']
+                for ingredient in ingredients
+            },
+            self.get_expected_totals()
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN of PostgreSQL')
+    def test_plan_uses_covering_index(self):
+        request = RequestFactory().get('/')
+        request.user = self.buyer
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ANALYZE recipes_recipeingredient, recipes_shoppingcart, '
+                'recipes_ingredient')
+            # Без этого план на тестовых объемах зависит от статистики.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = DownloadShoppingCart().get_ingredients(request).explain()
+        self.assertIn('unique_recipe_ingredient', plan)
+        self.assertNotIn('Seq Scan on recipes_recipeingredient', plan)
+
+
+class ShoppingCartPDFTest(APITestCase):
+    """PDF списка покупок на тысячи строк разбивается на страницы."""
+    lines_count = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.buyer = create_user('buyer')
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Продукт {index:04}', measurement_unit='г')
+            for index in range(cls.lines_count)
+        )
+        recipe = create_recipe(cls.author, ingredients, cls.tags)
+        ShoppingCart.objects.create(user=cls.buyer, recipe=recipe)
+
+    def test_pdf_pages(self):
+        self.client.force_authenticate(self.buyer)
+        with mock.patch.object(
+            Canvas, 'drawString', autospec=True,
+            side_effect=Canvas.drawString
+        ) as draw_string:
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/', {'format': 'pdf'})
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        lines = [call.args[3] for call in draw_string.call_args_list]
+        self.assertEqual(len(lines), self.lines_count + 1)
+        self.assertEqual(
+            lines[-1], f'Продукт {self.lines_count - 1:04} (г) — '
+            f'{self.lines_count}'
+        )
+        # Текст в PDF закодирован глифами шрифта, страницы считаются
+        # по объектам /Type /Page.
+        pages = len(re.findall(rb'/Type /Page\b', content))
+        self.assertGreater(pages, self.lines_count // 50)
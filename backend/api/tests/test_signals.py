@@ -0,0 +1,49 @@
+from django.contrib.auth.models import update_last_login
+
+from api.cache import get_generation
+from api.tests.base import APITestCase, create_user
+
+
+class AuthorChangedTest(APITestCase):
+    """Кэш рецептов сбрасывают только изменения данных автора."""
+
+    def assert_recipes_reset(self, expected, action):
+        generation = get_generation('recipes')
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+        self.assertEqual(
+            get_generation('recipes') != generation, expected)
+
+    def test_author_name(self):
+        self.author.first_name = 'Новое имя'
+        self.assert_recipes_reset(
+            True, lambda: self.author.save(update_fields=['first_name']))
+
+    def test_author_login(self):
+        self.assert_recipes_reset(
+            False, lambda: update_last_login(None, self.author))
+
+    def test_not_author(self):
+        self.assert_recipes_reset(False, self.user.save)
+
+    def test_registration(self):
+        self.assert_recipes_reset(False, lambda: create_user('new'))
+
+
+class AuthorTouchedTest(APITestCase):
+    """updated_at рецептов автора меняют только его данные в ответе."""
+
+    def get_updated_at(self):
+        return sorted(self.author.recipes.values_list(
+            'updated_at', flat=True))
+
+    def test_author_login(self):
+        updated_at = self.get_updated_at()
+        update_last_login(None, self.author)
+        self.assertEqual(self.get_updated_at(), updated_at)
+
+    def test_author_name(self):
+        updated_at = self.get_updated_at()
+        self.author.first_name = 'Новое имя'
+        self.author.save(update_fields=['first_name'])
+        self.assertNotEqual(self.get_updated_at(), updated_at)
@@ -0,0 +1,21 @@
+from api.tests.base import APITestCase, create_user
+from recipes.models import Subscribe
+
+
+class RecipesLimitTest(APITestCase):
+    """Некорректный recipes_limit дает 400, а не 500."""
+
+    def test_invalid_recipes_limit(self):
+        other = create_user('other')
+        for value in ('abc', '-1'):
+            with self.subTest(recipes_limit=value):
+                response = self.client.get(
+                    '/api/users/subscriptions/', {'recipes_limit': value})
+                self.assertEqual(response.status_code, 400)
+                response = self.client.post(
+                    f'/api/users/{other.id}/subscribe/'
+                    f'?recipes_limit={value}'
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            Subscribe.objects.filter(user=self.user, subscribe=other).exists())
@@ -1,22 +1,24 @@
-import os
+import hashlib
 from io import BytesIO
 
 from django.contrib.auth import get_user_model
-from django.db.models import (
-    BooleanField, Case, Count, F, Sum, When
+from django.db.models import Exists, F, OuterRef, Prefetch, Sum
+from django.http import (
+    FileResponse, HttpResponseNotModified, StreamingHttpResponse
 )
-from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, parse_etags
 from django_filters.rest_framework.backends import DjangoFilterBackend
 from djoser.views import UserViewSet
 
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-
 from rest_framework import (
-    filters, status, permissions, viewsets
+    status, permissions, viewsets
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework_simplejwt.token_blacklist.models import (
@@ -25,23 +27,38 @@ from rest_framework_simplejwt.token_blacklist.models import (
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.views import APIView
 
-from api.constants import (
-    FONT_SIZE, POSITION, RECIPES_LIMIT
+from api.cache import (
+    AnonymousResponseCacheMixin, get_generation, get_generation_time,
+    get_user_groups
 )
+from api.constants import RECIPES_LIMIT
 from api.filters import (
-    RecipeFilter, IngredientFilter
+    RecipeFilter, RecipeSearchFilter, IngredientFilter
+)
+from api.pagination import (
+    CustomPageNumberPagination, FeedCursorPagination, RecipePagination
 )
-from api.pagination import CustomPageNumberPagination
+from api.pdf import render_shopping_cart
 from api.permissions import AutorOrReadOnly
+from api.querysets import recipe_read_queryset
+from api.renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from api.shopping_cart import (
+    WRITERS, get_cached_file, get_cart_etag, get_cart_version,
+    set_cached_file
+)
 from api.serializers import (
     AvatarSerializer, IngredientSerializer,
     CustomTokenObtainPairSerializer, RecipeGetSerializer,
-    RecipeCreateUpdateSerializer, RecipeSerializer,
+    RecipeCreateUpdateSerializer, RecipeIdsSerializer, RecipeSerializer,
     SubscribeSerializer, TagSerializer, SubscribeCreateSerializer
 )
 from recipes.models import (
     Favorite, Ingredient, Recipe, ShoppingCart, Subscribe, Tag
 )
+from recipes.inserts import (
+    create_if_absent, delete_user_recipes, insert_ignoring_conflicts
+)
+from recipes.signals import user_recipes_changed
 
 User = get_user_model()
 
@@ -54,14 +71,33 @@ class UserCustomViewSet(UserViewSet):
             self.permission_classes = (permissions.IsAuthenticated,)
         return super().get_permissions()
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.action in ('list', 'retrieve') and user.is_authenticated:
+            queryset = queryset.annotate(
+                is_subscribed=Exists(Subscribe.objects.filter(
+                    user=user, subscribe=OuterRef('pk'))))
+        return queryset
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         if self.action == 'subscriptions':
-            context['recipes_limit'] = self.request.GET.get(
-                'recipes_limit', RECIPES_LIMIT)
+            context['recipes_limit'] = self.get_recipes_limit()
 
         return context
 
+    def get_recipes_limit(self):
+        """Число рецептов автора в ответе, 400 для некорректного значения."""
+        try:
+            recipes_limit = int(self.request.query_params.get(
+                'recipes_limit', RECIPES_LIMIT))
+            if recipes_limit < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({'error': 'Invalid recipes_limit value'})
+        return recipes_limit
+
     @action(
         detail=False,
         methods=['put', 'delete'],
@@ -87,14 +123,17 @@ class UserCustomViewSet(UserViewSet):
         pagination_class=CustomPageNumberPagination
     )
     def subscriptions(self, request, *args, **kwargs):
-        self.queryset = User.objects.annotate(
-            is_subscribe=Case(
-                When(subscribe__user=request.user, then=True),
-                default=False,
-                output_field=BooleanField()
-            ),
-            recipes_count=Count('recipes')
-        ).filter(is_subscribe=True)
+        recipes_limit = self.get_recipes_limit()
+        self.queryset = User.objects.filter(
+            subscribe__user=request.user
+        ).prefetch_related(Prefetch(
+            'recipes',
+            queryset=Recipe.objects.only(
+                'id', 'name', 'image', 'image_thumbnails', 'cooking_time',
+                'author_id'
+            )[:recipes_limit],
+            to_attr='limited_recipes'
+        ))
 
         return self.list(request, *args, **kwargs)
 
@@ -107,17 +146,9 @@ class UserCustomViewSet(UserViewSet):
 
         if request.method == 'POST':
             user = request.user
+            kwargs['recipes_limit'] = self.get_recipes_limit()
             try:
-                recipes_limit = int(request.GET.get(
-                    'recipes_limit', RECIPES_LIMIT))
-            except ValueError:
-                raise ValueError(
-                    f'{self.request}, Invalid recipes_limit value')
-            kwargs['recipes_limit'] = recipes_limit
-            try:
-                sub = self.get_queryset().annotate(
-                    recipes_count=Count('recipes')
-                ).get(id=self.get_object().id)
+                sub = self.get_object()
             except User.DoesNotExist:
                 return Response(
                     {'error': 'User not found'},
@@ -169,13 +200,16 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(AnonymousResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
+    response_cache_group = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(AnonymousResponseCacheMixin,
+                        viewsets.ReadOnlyModelViewSet):
+    response_cache_group = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filterset_class = IngredientFilter
@@ -183,14 +217,56 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (permissions.AllowAny,)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all().select_related(
-        'author').prefetch_related('ingredients', 'tags')
+class RecipeViewSet(AnonymousResponseCacheMixin, viewsets.ModelViewSet):
+    response_cache_group = 'recipes'
     permission_classes = (AutorOrReadOnly,)
-    pagination_class = CustomPageNumberPagination
-    search_fields = ['name', 'text']
+    pagination_class = RecipePagination
     filterset_class = RecipeFilter
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, RecipeSearchFilter]
+
+    def get_queryset(self):
+        return recipe_read_queryset(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """
+        Отвечает 304 до сериализации, если у клиента актуальная версия.
+
+        ETag строится по поколению кэша рецептов и флагов пользователя,
+        Last-Modified берется из updated_at рецепта или времени
+        последнего изменения ленты.
+        """
+        generations = get_user_groups(request.user)
+        etag = '"{}"'.format(hashlib.md5('{}:{}'.format(
+            [get_generation(group) for group in generations],
+            request.build_absolute_uri()
+        ).encode()).hexdigest())
+        last_modified = max(
+            get_generation_time(group) for group in generations)
+        if str(kwargs.get('pk', '')).isdigit():
+            updated_at = Recipe.objects.filter(
+                pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+            if updated_at is not None:
+                last_modified = int(updated_at.timestamp())
+                if request.user.is_authenticated:
+                    last_modified = max(last_modified, get_generation_time(
+                        f'user:{request.user.id}'))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -199,14 +275,37 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        self.refetch_instance(serializer)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self.refetch_instance(serializer)
+
+    def refetch_instance(self, serializer):
+        serializer.instance = self.get_queryset().get(
+            pk=serializer.instance.pk)
 
     def get_permissions(self):
         if self.action in (
-            'shopping_cart', 'favorite'
+            'shopping_cart', 'favorite', 'feed',
+            'shopping_cart_bulk', 'favorite_bulk'
         ):
             self.permission_classes = (permissions.IsAuthenticated,)
         return super().get_permissions()
 
+    @action(
+        detail=False,
+        methods=['get'],
+        pagination_class=FeedCursorPagination
+    )
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset().filter(
+            feed_items__user=request.user
+        ).annotate(feed_pub_date=F('feed_items__pub_date')))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_link(self, request, pk=None):
         recipe = self.get_object()
@@ -238,16 +337,35 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if request.method == 'DELETE':
             return self.delete_custom(request, model_class)
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart/bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        if request.method == 'POST':
+            return self.bulk_add_custom(request, ShoppingCart)
+        return self.bulk_delete_custom(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite/bulk'
+    )
+    def favorite_bulk(self, request):
+        if request.method == 'POST':
+            return self.bulk_add_custom(request, Favorite)
+        return self.bulk_delete_custom(request, Favorite)
+
     def add_custom(self, request, model_class, *args, **kwargs):
         user = request.user
         recipe = self.get_object()
-        if model_class.objects.filter(user=user, recipe=recipe).exists():
+        if create_if_absent(model_class, user=user, recipe=recipe) is None:
             return Response(
                 {'error':
                     'You already have this recipe in your shopping cart'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        model_class.objects.create(user=user, recipe=recipe)
         serializer = self.serializer_class(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -261,54 +379,115 @@ class RecipeViewSet(viewsets.ModelViewSet):
         obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def get_bulk_ids(self, request):
+        """Возвращает запрошенные id и id существующих рецептов."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        found = set(Recipe.objects.filter(
+            pk__in=recipe_ids).values_list('pk', flat=True))
+        return recipe_ids, found
+
+    def bulk_response(self, recipe_ids, found, done, done_status):
+        """
+        Статус по каждому id с теми же кодами, что и у add_custom
+        и delete_custom: 404 для несуществующего рецепта, 400 если
+        действие уже выполнено или невозможно.
+        """
+        return Response({'recipes': [
+            {
+                'id': recipe_id,
+                'status': (
+                    done_status if recipe_id in done
+                    else status.HTTP_400_BAD_REQUEST if recipe_id in found
+                    else status.HTTP_404_NOT_FOUND
+                )
+            }
+            for recipe_id in recipe_ids
+        ]}, status=status.HTTP_200_OK)
+
+    def bulk_add_custom(self, request, model_class):
+        recipe_ids, found = self.get_bulk_ids(request)
+        added = {obj.recipe_id for obj in insert_ignoring_conflicts([
+            model_class(user=request.user, recipe_id=recipe_id)
+            for recipe_id in recipe_ids if recipe_id in found
+        ])}
+        if added:
+            user_recipes_changed.send(
+                sender=model_class, user_id=request.user.pk,
+                recipe_ids=added, delta=1)
+        return self.bulk_response(
+            recipe_ids, found, added, status.HTTP_201_CREATED)
+
+    def bulk_delete_custom(self, request, model_class):
+        recipe_ids, found = self.get_bulk_ids(request)
+        deleted = delete_user_recipes(model_class, request.user.pk, found)
+        if deleted:
+            user_recipes_changed.send(
+                sender=model_class, user_id=request.user.pk,
+                recipe_ids=deleted, delta=-1)
+        return self.bulk_response(
+            recipe_ids, found, deleted, status.HTTP_204_NO_CONTENT)
+
 
 class DownloadShoppingCart(APIView):
+    """
+    Выгрузка списка покупок в PDF, TXT, CSV или JSON.
+
+    Формат выбирается параметром ?format= или заголовком Accept,
+    по умолчанию отдается PDF.
+    """
+    renderer_classes = (
+        PDFRenderer, PlainTextRenderer, CSVRenderer, JSONRenderer
+    )
 
     def get(self, request):
-        ingredients = ShoppingCart.objects.select_related(
-            'recipe', 'recipe__recipe_ingredients'
-        ).prefetch_related(
-            'recipe__recipe_ingredients__ingredient'
-        ).filter(
-            user=self.request.user
-        ).values(
-            name=F('recipe__recipe_ingredients__ingredient__name'),
-            unit=F('recipe__recipe_ingredients__ingredient__measurement_unit'),
+        user_id = request.user.id
+        renderer = request.accepted_renderer
+        version = get_cart_version(user_id)
+        etag = get_cart_etag(user_id, version, renderer.format)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        filename = f'shopping_cart.{renderer.format}'
+        if renderer.format == 'pdf':
+            content = get_cached_file(user_id, version)
+            if content is None:
+                content = render_shopping_cart(
+                    self.get_ingredients(request).iterator()).getvalue()
+                set_cached_file(user_id, version, content)
+            response = FileResponse(
+                BytesIO(content),
+                as_attachment=True,
+                filename=filename,
+                content_type=renderer.media_type
+            )
+        else:
+            writer = WRITERS[renderer.format]
+            response = StreamingHttpResponse(
+                writer(self.get_ingredients(request).iterator()),
+                content_type=f'{renderer.media_type}; charset=utf-8'
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="{filename}"')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def handle_exception(self, exc):
+        # Ошибки отдаются в JSON, а не под типом выбранного файла.
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get_ingredients(self, request):
+        return Ingredient.objects.filter(
+            recipe_ingredients__recipe__in=ShoppingCart.objects.filter(
+                user=request.user).values('recipe')
         ).annotate(
-            amount=Sum('recipe__recipe_ingredients__amount')
+            amount=Sum('recipe_ingredients__amount')
         ).values(
-            'name', 'unit', 'amount'
+            'name', 'amount', unit=F('measurement_unit')
         ).order_by('name')
-
-        buffer = self.get_file(ingredients)
-        response = HttpResponse(
-            buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = (
-            'attachment;'
-            'filename="shopping_cart.pdf"')
-        return response
-
-    def get_file(self, ingredients):
-        buffer = BytesIO()
-        font_path = os.path.join(os.path.dirname(
-            __file__), '../ttf/DejaVuSans.ttf')
-        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-        p = canvas.Canvas(buffer)
-        left, top = POSITION
-        p.setFont('DejaVuSans', FONT_SIZE)
-        p.drawString(left, top, 'Список покупок:')
-        top -= FONT_SIZE
-
-        for ingredient in ingredients:
-            name = ingredient['name']
-            unit = ingredient['unit']
-            amount = ingredient['amount']
-            p.drawString(
-                left, top,
-                f'{name} ({unit}) — {amount}'
-            )
-            top -= FONT_SIZE
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-        return buffer
@@ -49,7 +49,7 @@ class IngredientAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author')
+    list_display = ('name', 'author', 'favorites_count')
     fields = ('author', 'name', 'image', 'text', 'cooking_time',
               'tags', 'favorite_count')
     search_fields = ('author', 'name')
@@ -58,15 +58,14 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = [RecipeIngredientInline, ]
 
     def favorite_count(self, obj):
-        count = Favorite.objects.filter(recipe=obj).count()
-
-        return 'у {} пользователей'.format(count)
+        return 'у {} пользователей'.format(obj.favorites_count)
 
     favorite_count.short_description = 'В избранном'
 
 
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'first_name', 'last_name')
+    list_display = ('username', 'email', 'first_name', 'last_name',
+                    'recipes_count', 'subscribers_count')
     search_fields = ('username', 'email')
     inlines = [FavoriteInline, ShoppingCartInline, SubscribeInline]
 
@@ -2,3 +2,8 @@ MIN_VALUE = 1
 MAX_LENGTH = 256
 TAG_LENGTH = 32
 MEASUREMENT_UNIT_LENGTH = 64
+SEARCH_CONFIG = 'russian'
+THUMBNAIL_SIZES = {'small': 96, 'medium': 480}
+THUMBNAIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+THUMBNAIL_QUALITY = 80
+FEED_BATCH_SIZE = 1000
@@ -0,0 +1,54 @@
+from itertools import islice
+
+from recipes.constants import FEED_BATCH_SIZE
+from recipes.models import FeedItem, Recipe, Subscribe
+
+
+def fan_out_recipe(recipe):
+    """Добавляет новый рецепт в ленты всех подписчиков автора."""
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, recipe=recipe, pub_date=recipe.pub_date)
+            for user_id in Subscribe.objects.filter(
+                subscribe_id=recipe.author_id
+            ).values_list('user_id', flat=True).iterator()
+        ],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def add_author_to_feed(user_id, author_id):
+    """Добавляет в ленту пользователя все рецепты автора."""
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+            for recipe_id, pub_date in Recipe.objects.filter(
+                author_id=author_id
+            ).values_list('id', 'pub_date').iterator()
+        ],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def build_feed():
+    """
+    Заполняет ленты по всем подпискам.
+
+    Пары подписчик-рецепт читаются одним запросом с JOIN подписок
+    и рецептов, вставка идет пачками по FEED_BATCH_SIZE.
+    """
+    items = (
+        FeedItem(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+        for user_id, recipe_id, pub_date in Recipe.objects.filter(
+            author__subscribe__isnull=False
+        ).values_list(
+            'author__subscribe__user_id', 'id', 'pub_date'
+        ).order_by().iterator(chunk_size=FEED_BATCH_SIZE)
+    )
+    while True:
+        batch = list(islice(items, FEED_BATCH_SIZE))
+        if not batch:
+            break
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
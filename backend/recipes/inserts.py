@@ -0,0 +1,89 @@
+from django.db import connection
+from django.db.models.signals import post_save
+
+
+def insert_ignoring_conflicts(objs):
+    """
+    Вставляет объекты одной модели одним
+    INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Возвращает только вставленные объекты с заполненным pk,
+    строки, нарушившие уникальность, пропускаются без ошибки.
+    Сигналы post_save не отправляются.
+    """
+    if not objs:
+        return []
+    opts = objs[0]._meta
+    quote_name = connection.ops.quote_name
+    fields = [
+        field for field in opts.concrete_fields if not field.primary_key
+    ]
+    rows = {
+        tuple(
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in fields
+        ): obj
+        for obj in objs
+    }
+    placeholders = ', '.join(['%s'] * len(fields))
+    columns = ', '.join(quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote_name(opts.db_table)} ({columns}) '
+            f'VALUES {", ".join([f"({placeholders})"] * len(rows))} '
+            f'ON CONFLICT DO NOTHING '
+            f'RETURNING {quote_name(opts.pk.column)}, {columns}',
+            [value for row in rows for value in row]
+        )
+        inserted = []
+        for pk, *row in cursor.fetchall():
+            obj = rows[tuple(row)]
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = connection.alias
+            inserted.append(obj)
+    return inserted
+
+
+def create_if_absent(model, **fields):
+    """
+    Создает запись, если ее еще нет, без отдельной проверки exists().
+
+    Возвращает созданный объект или None, если запись уже есть.
+    Для созданной записи отправляется post_save, как при save().
+    """
+    inserted = insert_ignoring_conflicts([model(**fields)])
+    if not inserted:
+        return None
+    obj = inserted[0]
+    post_save.send(
+        sender=model, instance=obj, created=True,
+        update_fields=None, raw=False, using=obj._state.db)
+    return obj
+
+
+def delete_user_recipes(model, user_id, recipe_ids):
+    """
+    Удаляет записи пользователя по id рецептов одним
+    DELETE ... RETURNING.
+
+    Возвращает множество id рецептов, строки которых удалил именно
+    этот запрос: строки, удаленные параллельным запросом, в него
+    не попадают. Сигналы post_delete не отправляются.
+    """
+    if not recipe_ids:
+        return set()
+    opts = model._meta
+    quote_name = connection.ops.quote_name
+    user_column = quote_name(opts.get_field('user').column)
+    recipe_column = quote_name(opts.get_field('recipe').column)
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote_name(opts.db_table)} '
+            f'WHERE {user_column} = %s '
+            f'AND {recipe_column} IN ({placeholders}) '
+            f'RETURNING {recipe_column}',
+            [user_id, *recipe_ids]
+        )
+        return {recipe_id for recipe_id, in cursor.fetchall()}
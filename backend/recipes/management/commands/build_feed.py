@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import build_feed
+from recipes.models import FeedItem
+
+
+class Command(BaseCommand):
+    """
+    Заново заполняет ленты пользователей по их подпискам.
+    """
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            FeedItem.objects.all().delete()
+            build_feed()
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Built feed with %d items' % FeedItem.objects.count())
+        )
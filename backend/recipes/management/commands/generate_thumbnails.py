@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.thumbnails import update_thumbnails
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Создает уменьшенные копии изображений рецептов и аватаров,
+    у которых их еще нет.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии для всех изображений.')
+
+    def handle(self, *args, **options):
+        for model, field_name in ((Recipe, 'image'), (User, 'avatar')):
+            queryset = model.objects.exclude(
+                **{field_name: ''}
+            ).exclude(**{f'{field_name}__isnull': True})
+            if not options['all']:
+                queryset = queryset.filter(**{f'{field_name}_thumbnails': {}})
+            count = 0
+            for instance in queryset.iterator():
+                update_thumbnails(instance, field_name)
+                count += 1
+            self.stdout.write(self.style.SUCCESS(
+                'Generated thumbnails for %d %s' % (
+                    count, model._meta.verbose_name_plural)))
@@ -1,47 +1,137 @@
 import csv
-import os
+import io
+import json
 import pathlib
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import (
     Ingredient,
     Tag,
 )
 
+DATA_DIR = pathlib.Path(__file__).parent.parent.parent.parent / 'data'
+DEFAULT_FILES = (
+    DATA_DIR / 'ingredients.csv',
+    DATA_DIR / 'tags.csv',
+)
+MODELS = {
+    'ingredients': Ingredient,
+    'tags': Tag,
+}
+BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
     """
-    Класс для импорта данных из csv файлов в базу данных.
+    Класс для импорта данных из csv и json файлов в базу данных.
+
+    Модель выбирается по имени файла: ingredients.* или tags.*.
+    Уже существующие записи пропускаются.
     """
 
-    def handle(self, *args, **options):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files', nargs='*', type=pathlib.Path,
+            help='Файлы для импорта, по умолчанию data/ingredients.csv '
+                 'и data/tags.csv.')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одном INSERT.')
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Загружать через COPY (только PostgreSQL).')
 
-        self.load_data()
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy requires PostgreSQL')
+        self.load_data(
+            options['files'] or DEFAULT_FILES,
+            options['batch_size'],
+            options['copy'],
+        )
 
-    def load_data(self):
+    def load_data(self, files, batch_size, use_copy):
         """
-        Считывает данные из csv файлов и сохраняет их в базу данных.
+        Считывает данные из файлов и сохраняет их в базу данных.
         """
-        root_dir = pathlib.Path(__file__).parent.parent.parent.parent
-        data_dir = root_dir / 'data'
-
-        models = {
-            'ingredients.csv': Ingredient,
-            'tags.csv': Tag,
-        }
-        for filename, model in models.items():
-            file_path = os.path.join(data_dir, filename)
-
+        total_start = time.monotonic()
+        for file_path in files:
+            model = MODELS.get(file_path.stem)
+            if model is None:
+                raise CommandError(f'Unknown data file: {file_path}')
+            start = time.monotonic()
             with open(file_path, encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-
-                for row in reader:
-                    model.objects.get_or_create(**row)
+                rows = self.read_rows(file, file_path.suffix)
+                if use_copy:
+                    count = self.copy_rows(model, rows)
+                else:
+                    count = self.insert_rows(model, rows, batch_size)
             self.stdout.write(
                 self.style.SUCCESS(
-                    'Successfully imported data from %s' % filename)
+                    'Successfully processed %d rows from %s in %.2f s'
+                    % (count, file_path.name, time.monotonic() - start))
             )
         self.stdout.write(
-            self.style.SUCCESS('Imported all data')
+            self.style.SUCCESS(
+                'Imported all data in %.2f s'
+                % (time.monotonic() - total_start))
         )
+
+    def read_rows(self, file, suffix):
+        if suffix == '.csv':
+            return csv.DictReader(file)
+        if suffix == '.json':
+            return iter(json.load(file))
+        raise CommandError(f'Unsupported file format: {suffix}')
+
+    def insert_rows(self, model, rows, batch_size):
+        count = 0
+        with transaction.atomic():
+            while batch := list(islice(rows, batch_size)):
+                model.objects.bulk_create(
+                    [model(**row) for row in batch],
+                    ignore_conflicts=True
+                )
+                count += len(batch)
+        return count
+
+    def copy_rows(self, model, rows):
+        """
+        Загружает строки через COPY во временную таблицу
+        и переносит их одним INSERT ... ON CONFLICT DO NOTHING.
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(model._meta.db_table)
+        columns = [
+            field.column for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        column_list = ', '.join(quote_name(column) for column in columns)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+            count += 1
+        buffer.seek(0)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE import_data ON COMMIT DROP AS '
+                f'SELECT {column_list} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY import_data ({column_list}) FROM STDIN WITH CSV',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({column_list}) '
+                f'SELECT {column_list} FROM import_data '
+                f'ON CONFLICT DO NOTHING'
+            )
+        return count
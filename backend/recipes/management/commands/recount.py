@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount_all
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает счетчики избранного, рецептов и подписчиков.
+    """
+
+    def handle(self, *args, **options):
+        recount_all()
+        self.stdout.write(self.style.SUCCESS('Recounted all counters'))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-17 06:56
+
+from django.db import migrations, models
+
+
+def fill_dimensions(apps, schema_editor):
+    """Заполняет размеры уже загруженных изображений."""
+    model = apps.get_model('recipes', 'Recipe')
+    objects = model.objects.exclude(image='').filter(
+        image__isnull=False, image_width__isnull=True)
+    for obj in objects.iterator():
+        try:
+            width, height = obj.image.width, obj.image.height
+        except (OSError, ValueError):
+            continue
+        model.objects.filter(pk=obj.pk).update(
+            image_width=width, image_height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_alter_ingredient_name_alter_tag_name_alter_tag_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.RunPython(fill_dimensions, migrations.RunPython.noop),
+    ]
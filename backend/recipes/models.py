@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
+from django.db.models.functions import Upper
 
 from foodgram.settings import ALLOWED_HOSTS
 from recipes.constants import (
-    MIN_VALUE, TAG_LENGTH, MAX_LENGTH, MEASUREMENT_UNIT_LENGTH
+    MIN_VALUE, TAG_LENGTH, MAX_LENGTH, MEASUREMENT_UNIT_LENGTH, SEARCH_CONFIG
 )
 
 
@@ -41,6 +44,14 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        indexes = [
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='ingredient_name_trgm'),
+            models.Index(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='ingredient_name_prefix'),
+        ]
 
     def __str__(self):
         return self.name + ' - ' + self.measurement_unit
@@ -83,6 +94,12 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Изображение',
         upload_to='recipes/images/')
+    image_width = models.PositiveIntegerField(
+        'Ширина изображения', null=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота изображения', null=True, editable=False)
+    image_thumbnails = models.JSONField(
+        'Уменьшенные копии изображения', default=dict, editable=False)
     text = models.TextField('Описание рецепта')
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -96,9 +113,18 @@ class Recipe(models.Model):
         'Время приготовления (в минутах)',
         validators=[MinValueValidator(MIN_VALUE)])
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False)
+    favorites_count = models.PositiveIntegerField(
+        'В избранном', default=0, editable=False)
 
     class Meta:
         ordering = ['-pub_date', 'id']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='recipe_search_vector'),
+            models.Index(fields=['-pub_date', 'id'], name='recipe_feed'),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -108,13 +134,22 @@ class Recipe(models.Model):
     def get_link(self):
         return f'http://{ALLOWED_HOSTS[-1]}/l/{self.id}/'
 
+    @staticmethod
+    def get_search_vector():
+        return (
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        )
+
 
 class RecipeIngredient(models.Model):
     """Модель ингредиентов рецепта."""
+    # Поиск по рецепту обслуживает unique_recipe_ingredient.
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        related_name='recipe_ingredients'
+        related_name='recipe_ingredients',
+        db_index=False
     )
     ingredient = models.ForeignKey(
         Ingredient,
@@ -130,6 +165,7 @@ class RecipeIngredient(models.Model):
         constraints = [
             models.UniqueConstraint(
                 fields=['recipe', 'ingredient'],
+                include=['amount'],
                 name='unique_recipe_ingredient'
             )
         ]
@@ -191,3 +227,35 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'
+
+
+class FeedItem(models.Model):
+    """Рецепт в ленте подписчика автора."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_item')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='feed_user_pub_date'),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date',)
+
+    def __str__(self):
+        return f'{self.user} - {self.recipe}'
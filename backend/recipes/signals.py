@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from recipes.counters import change_counter, change_counters
+from recipes.feed import add_author_to_feed, fan_out_recipe
+from recipes.models import Favorite, FeedItem, Recipe, Subscribe
+from recipes.thumbnails import delete_thumbnails, update_thumbnails
+
+User = get_user_model()
+
+# Отправляется после массового добавления или удаления рецептов
+# в избранное или корзину, которые не вызывают post_save/post_delete.
+# Аргументы: user_id, recipe_ids, delta (1 или -1).
+user_recipes_changed = Signal()
+
+
+def store_image_dimensions(instance, field_name):
+    """
+    Запоминает размеры нового изображения, пока оно еще в памяти,
+    и отмечает его для создания уменьшенных копий после сохранения.
+    Копии удаленного изображения отмечаются для удаления.
+    """
+    file = getattr(instance, field_name)
+    if file and file._committed:
+        return
+    if not file:
+        width = height = None
+        thumbnails = getattr(instance, f'{field_name}_thumbnails')
+        if thumbnails:
+            instance.__dict__.setdefault('_stale_thumbnails', {})[
+                field_name] = thumbnails
+        setattr(instance, f'{field_name}_thumbnails', {})
+    elif not file._committed:
+        width, height = file.width, file.height
+        instance._uploaded_images = (
+            getattr(instance, '_uploaded_images', ()) + (field_name,))
+    setattr(instance, f'{field_name}_width', width)
+    setattr(instance, f'{field_name}_height', height)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_changed(sender, instance, **kwargs):
+    store_image_dimensions(instance, 'image')
+
+
+@receiver(pre_save, sender=User)
+def avatar_changed(sender, instance, **kwargs):
+    store_image_dimensions(instance, 'avatar')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def image_uploaded(sender, instance, **kwargs):
+    stale = instance.__dict__.pop('_stale_thumbnails', {})
+    for field_name, thumbnails in stale.items():
+        delete_thumbnails(getattr(instance, field_name).storage, thumbnails)
+    for field_name in instance.__dict__.pop('_uploaded_images', ()):
+        update_thumbnails(instance, field_name)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(user_recipes_changed, sender=Favorite)
+def favorites_changed(sender, recipe_ids, delta, **kwargs):
+    change_counters(Recipe, recipe_ids, 'favorites_count', delta)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.subscribe_id, 'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.subscribe_id, 'subscribers_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        fan_out_recipe(instance)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_feed_created(sender, instance, created, **kwargs):
+    if created:
+        add_author_to_feed(instance.user_id, instance.subscribe_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_feed_deleted(sender, instance, **kwargs):
+    FeedItem.objects.filter(
+        user_id=instance.user_id,
+        recipe__author_id=instance.subscribe_id
+    ).delete()
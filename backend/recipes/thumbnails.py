@@ -0,0 +1,80 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from recipes.constants import (
+    THUMBNAIL_FORMATS, THUMBNAIL_QUALITY, THUMBNAIL_SIZES
+)
+
+
+def thumbnail_name(name, size, ext):
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}_{size}.{ext}'))
+
+
+def generate_thumbnails(field_file):
+    """
+    Сохраняет рядом с изображением уменьшенные копии в WebP и JPEG.
+
+    Возвращает имена файлов в хранилище: {размер: {формат: имя}}.
+    """
+    storage = field_file.storage
+    field_file.open('rb')
+    try:
+        image = ImageOps.exif_transpose(Image.open(field_file))
+        image.load()
+    finally:
+        field_file.close()
+    thumbnails = {}
+    for size_name, size in THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        thumbnails[size_name] = {}
+        for ext, image_format in THUMBNAIL_FORMATS.items():
+            mode = 'RGB' if image_format == 'JPEG' else 'RGBA'
+            frame = thumbnail
+            if frame.mode not in ('RGB', mode):
+                frame = frame.convert(mode)
+            buffer = BytesIO()
+            frame.save(buffer, image_format, quality=THUMBNAIL_QUALITY)
+            thumbnails[size_name][ext] = storage.save(
+                thumbnail_name(field_file.name, size_name, ext),
+                ContentFile(buffer.getvalue())
+            )
+    return thumbnails
+
+
+def delete_thumbnails(storage, thumbnails):
+    """
+    Удаляет из хранилища файлы копий {размер: {формат: имя}}
+    после коммита, чтобы откат не оставил ссылок на удаленные файлы.
+    """
+    names = [name for files in thumbnails.values() for name in files.values()]
+
+    def delete():
+        for name in names:
+            storage.delete(name)
+
+    transaction.on_commit(delete)
+
+
+def update_thumbnails(instance, field_name):
+    """
+    Пересоздает уменьшенные копии, сохраняет их имена в модель
+    и удаляет файлы прежних копий.
+    """
+    field_file = getattr(instance, field_name)
+    delete_thumbnails(
+        field_file.storage, getattr(instance, f'{field_name}_thumbnails'))
+    thumbnails = {}
+    if field_file:
+        try:
+            thumbnails = generate_thumbnails(field_file)
+        except (OSError, ValueError):
+            pass
+    setattr(instance, f'{field_name}_thumbnails', thumbnails)
+    type(instance).objects.filter(pk=instance.pk).update(
+        **{f'{field_name}_thumbnails': thumbnails})
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-17 06:56
+
+from django.db import migrations, models
+
+
+def fill_dimensions(apps, schema_editor):
+    """Заполняет размеры уже загруженных изображений."""
+    model = apps.get_model('users', 'User')
+    objects = model.objects.exclude(avatar='').filter(
+        avatar__isnull=False, avatar_width__isnull=True)
+    for obj in objects.iterator():
+        try:
+            width, height = obj.avatar.width, obj.avatar.height
+        except (OSError, ValueError):
+            continue
+        model.objects.filter(pk=obj.pk).update(
+            avatar_width=width, avatar_height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Высота аватара'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Ширина аватара'),
+        ),
+        migrations.RunPython(fill_dimensions, migrations.RunPython.noop),
+    ]
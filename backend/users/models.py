@@ -15,6 +15,16 @@ class User(AbstractUser):
         default=None,
         verbose_name='Аватар',
     )
+    avatar_width = models.PositiveIntegerField(
+        'Ширина аватара', null=True, editable=False)
+    avatar_height = models.PositiveIntegerField(
+        'Высота аватара', null=True, editable=False)
+    avatar_thumbnails = models.JSONField(
+        'Уменьшенные копии аватара', default=dict, editable=False)
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False)
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
         'id',